@@ -11,15 +11,44 @@ merge_macros.py - STABLE RESTORE POINT (v3.4.0) - HUMAN-LIKE MOVEMENTS
 - FEATURE: Smooth transitions back to next recorded position
 - FIX: Idle mouse movements SKIP drag sequences
 - FIX: Naming scheme 29A, 29B, 29C (number before letter)
-- OPTIMIZED: Cached durations, single os.walk(), shallow copy.
+- OPTIMIZED: Cached durations + parsed events, single scandir walk, shallow copy.
 """
 
-import argparse, json, random, re, sys, os, math, shutil
+import argparse, json, random, re, os, math, shutil
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+IDENTITY_RE = re.compile(r'(\s*-\s*Copy(\s*\(\d+\))?)|(\s*\(\d+\))', re.IGNORECASE)
+FOLDER_NUMBER_RE = re.compile(r'^(\d+)-')
+TIME_SENSITIVE_RE = re.compile(r'time[\s-]*sens')
+ALWAYS_FIRST_LAST_RE = re.compile(r'always ?(?:first|last)', re.IGNORECASE)
+
+# Gap multipliers with cumulative weights (normal 50/30/20, inefficient 20/40/40)
+MULTIPLIERS = (1, 2, 3)
+NORMAL_MULT_CUM_WEIGHTS = (50, 80, 100)
+INEF_MULT_CUM_WEIGHTS = (20, 60, 100)
+
+def json_loads_file(path: Path):
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def json_dumps_bytes(obj, pretty=False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else None)
+    if pretty:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
 def load_json_events(path: Path):
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        data = json_loads_file(path)
         events = []
         if isinstance(data, dict):
             found_list = None
@@ -34,18 +63,19 @@ def load_json_events(path: Path):
         cleaned = []
         for e in events:
             if isinstance(e, list) and len(e) > 0: e = e[0]
-            if isinstance(e, dict) and "Time" in e: cleaned.append(e)
+            if isinstance(e, dict) and "Time" in e:
+                # Coerce once here so downstream code can use Time as an int directly
+                e["Time"] = int(e["Time"])
+                cleaned.append(e)
         return cleaned
     except Exception:
         return []
 
-def get_file_duration_ms(path: Path) -> int:
-    events = load_json_events(path)
-    if not events: return 0
-    try:
-        times = [int(e.get("Time", 0)) for e in events]
-        return max(times) - min(times)
-    except: return 0
+def get_events_time_bounds(events):
+    """Return (first, last) Time across events, or (0, 0) if there are none."""
+    if not events: return 0, 0
+    times = [e["Time"] for e in events]
+    return min(times), max(times)
 
 def format_ms_precise(ms: int) -> str:
     ts = int(round(ms / 1000))
@@ -53,14 +83,14 @@ def format_ms_precise(ms: int) -> str:
     return f"{m}m {s}s" if m > 0 else f"{s}s"
 
 def clean_identity(name: str) -> str:
-    return re.sub(r'(\s*-\s*Copy(\s*\(\d+\))?)|(\s*\(\d+\))', '', name, flags=re.IGNORECASE).strip().lower()
+    return IDENTITY_RE.sub('', name).strip().lower()
 
 def extract_folder_number(folder_name: str) -> int:
     """
     Extract number from folder name like '1-Mining' or '23-Fishing'.
     Returns the number, or 0 if not found.
     """
-    match = re.match(r'^(\d+)-', folder_name)
+    match = FOLDER_NUMBER_RE.match(folder_name)
     if match:
         return int(match.group(1))
     return 0
@@ -70,35 +100,122 @@ def is_always_first_or_last_file(filename: str) -> bool:
     Check if a file should be treated as "always first" or "always last".
     Checks if these phrases appear ANYWHERE in the filename (case-insensitive).
     """
-    filename_lower = filename.lower()
-    patterns = ["always first", "always last", "alwaysfirst", "alwayslast"]
-    return any(pattern in filename_lower for pattern in patterns)
+    return ALWAYS_FIRST_LAST_RE.search(filename) is not None
 
-def is_in_drag_sequence(events, index):
+def clone_file(src: Path, dst: Path):
     """
-    Check if the given index is inside a drag sequence (between DragStart and DragEnd).
-    Returns True if we're in the middle of a drag.
+    Hardlink src to dst instead of copying its bytes. Symlinks are resolved
+    first so the bundle gets the target's contents, as shutil.copy2 would give
+    it. An existing dst is unlinked rather than written through, since it may
+    itself be a hardlink to another source file. Falls back to shutil.copy2
+    when linking is not possible, e.g. across filesystems.
     """
-    drag_started = False
-    for j in range(index, -1, -1):
-        event_type = events[j].get("Type", "")
-        if event_type == "DragEnd":
-            return False
-        elif event_type == "DragStart":
-            drag_started = True
-            break
+    target = os.path.realpath(src)
+    if os.path.lexists(dst):
+        if os.path.exists(dst) and os.path.samefile(target, dst):
+            return
+        os.unlink(dst)
+    try:
+        os.link(target, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+SKIP_DIR_NAMES = {".git", ".github", "output"}
+
+def scope_folder_name(name: str):
+    """Return the folder name if it marks a desktop/mobile scope, else None."""
+    lowered = name.lower()
+    return name if ("desktop" in lowered or "mobile" in lowered) else None
+
+def walk_macro_dirs(root):
+    """
+    Depth-first directory walk on os.scandir, yielding (dir_path, file_names,
+    parent_scope) in the same order as os.walk(). parent_scope is the first
+    desktop/mobile folder on the path, resolved once and handed down to
+    children. Folders in SKIP_DIR_NAMES are pruned instead of being walked.
+    """
+    root_scope = next((part for part in Path(root).parts if scope_folder_name(part)), None)
+    stack = [(str(root), root_scope)]
+    while stack:
+        current, parent_scope = stack.pop()
+        subdirs, files = [], []
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        # Like os.walk: symlinked dirs are not files, but are not descended into.
+                        if entry.name not in SKIP_DIR_NAMES and not entry.is_symlink():
+                            subdirs.append((entry.path, parent_scope or scope_folder_name(entry.name)))
+                    else:
+                        files.append(entry.name)
+        except OSError:
+            continue
+        yield current, files, parent_scope
+        stack.extend(reversed(subdirs))
+
+def add_pool_files(pool_data, file_paths):
+    """Add macro files to a pool, setting "always first/last" files aside."""
+    for fp in file_paths:
+        if is_always_first_or_last_file(fp.name):
+            pool_data["always_files"].append(fp)
+        else:
+            pool_data["files"].append(fp)
+
+def build_drag_mask(events):
+    """
+    Mark every index that is inside a drag sequence (between DragStart and DragEnd).
+    Two linear passes instead of scanning outwards from each index.
+    """
+    types = [e.get("Type", "") for e in events]
+    if "DragStart" not in types:
+        return [False] * len(types)
     
-    if not drag_started:
-        return False
+    # Backward pass: is the next drag marker after i a DragEnd?
+    end_follows = [False] * len(types)
+    upcoming_end = False
+    for i in range(len(types) - 1, -1, -1):
+        end_follows[i] = upcoming_end
+        if types[i] == "DragEnd":
+            upcoming_end = True
+        elif types[i] == "DragStart":
+            upcoming_end = False
     
-    for j in range(index + 1, len(events)):
-        event_type = events[j].get("Type", "")
+    # Forward pass: was the last drag marker at or before i a DragStart?
+    mask = [False] * len(types)
+    drag_started = False
+    for i, event_type in enumerate(types):
         if event_type == "DragEnd":
-            return True
+            drag_started = False
         elif event_type == "DragStart":
-            return False
+            drag_started = True
+        mask[i] = drag_started and end_follows[i]
     
-    return False
+    return mask
+
+@lru_cache(maxsize=1024)
+def speed_profile_ts(speed_profile, num_steps):
+    """
+    Non-linear time progression t for steps 0..num_steps under a speed profile.
+    Cached: paths only ever use a few hundred (profile, num_steps) combinations.
+    """
+    ts = []
+    for step in range(num_steps + 1):
+        t_raw = step / num_steps
+        
+        if speed_profile == 'fast_start':
+            # Fast at start, slow at end
+            t = 1 - (1 - t_raw) ** 2
+        elif speed_profile == 'slow_start':
+            # Slow at start, fast at end
+            t = t_raw ** 2
+        elif speed_profile == 'hesitant':
+            # Slow-fast-slow with micro-pauses
+            t = 0.5 * (1 - math.cos(t_raw * math.pi))
+        else:  # medium
+            # Slight ease in/out
+            t = 0.5 * (1 - math.cos(t_raw * math.pi))
+        ts.append(t)
+    return tuple(ts)
 
 def generate_human_path(start_x, start_y, end_x, end_y, duration_ms, rng):
     """
@@ -119,6 +236,10 @@ def generate_human_path(start_x, start_y, end_x, end_y, duration_ms, rng):
     if distance < 5:
         return [(0, end_x, end_y)]
     
+    # Direction unit vector (perpendicular is (-unit_y, unit_x)), loop-invariant
+    unit_x = dx / (distance + 1)
+    unit_y = dy / (distance + 1)
+    
     # Determine speed profile (variable speeds make it human)
     speed_profile = rng.choice(['fast_start', 'slow_start', 'medium', 'hesitant'])
     
@@ -132,31 +253,17 @@ def generate_human_path(start_x, start_y, end_x, end_y, duration_ms, rng):
         # Offset perpendicular to main direction
         offset = rng.uniform(-0.3, 0.3) * distance
         t = rng.uniform(0.2, 0.8)
-        ctrl_x = start_x + dx * t + (-dy / (distance + 1)) * offset
-        ctrl_y = start_y + dy * t + (dx / (distance + 1)) * offset
+        ctrl_x = start_x + dx * t - unit_y * offset
+        ctrl_y = start_y + dy * t + unit_x * offset
         control_points.append((ctrl_x, ctrl_y, t))
     
     control_points.sort(key=lambda p: p[2])  # Sort by t position
     
+    last_ctrl = len(control_points) - 1
     current_time = 0
     
-    for step in range(num_steps + 1):
-        # Non-linear time progression based on speed profile
-        t_raw = step / num_steps
-        
-        if speed_profile == 'fast_start':
-            # Fast at start, slow at end
-            t = 1 - (1 - t_raw) ** 2
-        elif speed_profile == 'slow_start':
-            # Slow at start, fast at end
-            t = t_raw ** 2
-        elif speed_profile == 'hesitant':
-            # Slow-fast-slow with micro-pauses
-            t = 0.5 * (1 - math.cos(t_raw * math.pi))
-        else:  # medium
-            # Slight ease in/out
-            t = 0.5 * (1 - math.cos(t_raw * math.pi))
-        
+    # Non-linear time progression based on speed profile
+    for step, t in enumerate(speed_profile_ts(speed_profile, num_steps)):
         # Calculate position using control points (imperfect curve)
         if not control_points:
             # Simple interpolation with wobble
@@ -172,7 +279,7 @@ def generate_human_path(start_x, start_y, end_x, end_y, duration_ms, rng):
                     y = start_y + (ctrl_y - start_y) * segment_t
                     break
                 else:
-                    if i == len(control_points) - 1:
+                    if i == last_ctrl:
                         # Last segment
                         segment_t = (t - ctrl_t) / (1 - ctrl_t) if (1 - ctrl_t) > 0 else 0
                         x = ctrl_x + (end_x - ctrl_x) * segment_t
@@ -189,12 +296,14 @@ def generate_human_path(start_x, start_y, end_x, end_y, duration_ms, rng):
         if step > 0 and step < num_steps and rng.random() < 0.15:
             overshoot = rng.uniform(5, 15)
             direction = 1 if rng.random() < 0.5 else -1
-            x += direction * overshoot * (dx / (distance + 1))
-            y += direction * overshoot * (dy / (distance + 1))
+            x += direction * overshoot * unit_x
+            y += direction * overshoot * unit_y
         
         # Keep within bounds
-        x = max(100, min(1800, int(x)))
-        y = max(100, min(1000, int(y)))
+        x = int(x)
+        x = 100 if x < 100 else (1800 if x > 1800 else x)
+        y = int(y)
+        y = 100 if y < 100 else (1000 if y > 1000 else y)
         
         # Calculate time with variable speed
         time_progress = t
@@ -211,6 +320,148 @@ def generate_human_path(start_x, start_y, end_x, end_y, duration_ms, rng):
     
     return path
 
+def append_mouse_moves(result, path, base_time):
+    """Append a generated (time_ms, x, y) path to result as MouseMove events starting at base_time."""
+    result.extend([{"Time": base_time + path_time, "Type": "MouseMove", "X": px, "Y": py}
+                   for path_time, px, py in path])
+
+def clamp_to_screen(x, y):
+    """Clamp a target point to the usable screen area."""
+    return max(100, min(1800, x)), max(100, min(1000, y))
+
+# Idle behaviors: each emits its MouseMove pattern into result starting at
+# movement_start and returns where the cursor ends up.
+
+def idle_wander(result, start_x, start_y, movement_start, pattern_duration, rng):
+    """Random wandering - multiple small moves."""
+    num_moves = rng.randint(3, 6)
+    move_duration = pattern_duration // num_moves
+    
+    current_x, current_y = start_x, start_y
+    pattern_time_used = 0
+    
+    for _ in range(num_moves):
+        # Pick random nearby target
+        target_x, target_y = clamp_to_screen(current_x + rng.randint(-150, 150),
+                                             current_y + rng.randint(-100, 100))
+        
+        path = generate_human_path(current_x, current_y, target_x, target_y, move_duration, rng)
+        append_mouse_moves(result, path, movement_start + pattern_time_used)
+        
+        current_x, current_y = path[-1][1], path[-1][2]
+        pattern_time_used += move_duration
+    
+    return current_x, current_y
+
+def idle_check_edge(result, start_x, start_y, movement_start, pattern_duration, rng):
+    """Quick look at a screen edge, then back near the start."""
+    edges = [
+        (150, start_y),    # Left edge
+        (1750, start_y),   # Right edge
+        (start_x, 150),    # Top edge
+        (start_x, 950),    # Bottom edge
+    ]
+    edge_x, edge_y = rng.choice(edges)
+    
+    # Move to edge (60% of time, fast)
+    edge_duration = int(pattern_duration * 0.6)
+    path_to_edge = generate_human_path(start_x, start_y, edge_x, edge_y, edge_duration, rng)
+    append_mouse_moves(result, path_to_edge, movement_start)
+    
+    # Return near start (40% of time, slower)
+    return_duration = pattern_duration - edge_duration
+    return_x, return_y = clamp_to_screen(start_x + rng.randint(-40, 40),
+                                         start_y + rng.randint(-40, 40))
+    
+    path_return = generate_human_path(edge_x, edge_y, return_x, return_y, return_duration, rng)
+    append_mouse_moves(result, path_return, movement_start + edge_duration)
+    
+    return path_return[-1][1], path_return[-1][2]
+
+def idle_fidget(result, start_x, start_y, movement_start, pattern_duration, rng):
+    """Small rapid movements in a small area."""
+    num_fidgets = rng.randint(5, 10)
+    fidget_duration = pattern_duration // num_fidgets
+    
+    current_x, current_y = start_x, start_y
+    pattern_time_used = 0
+    
+    for _ in range(num_fidgets):
+        # Small offset
+        target_x, target_y = clamp_to_screen(current_x + rng.randint(-30, 30),
+                                             current_y + rng.randint(-30, 30))
+        
+        path = generate_human_path(current_x, current_y, target_x, target_y, fidget_duration, rng)
+        append_mouse_moves(result, path, movement_start + pattern_time_used)
+        
+        current_x, current_y = path[-1][1], path[-1][2]
+        pattern_time_used += fidget_duration
+    
+    return current_x, current_y
+
+def idle_explore(result, start_x, start_y, movement_start, pattern_duration, rng):
+    """Move far away, then return near the start."""
+    away_x, away_y = clamp_to_screen(start_x + rng.randint(-400, 400),
+                                     start_y + rng.randint(-300, 300))
+    
+    # Go away (65% of time)
+    away_duration = int(pattern_duration * 0.65)
+    path_away = generate_human_path(start_x, start_y, away_x, away_y, away_duration, rng)
+    append_mouse_moves(result, path_away, movement_start)
+    
+    # Return (35% of time)
+    return_duration = pattern_duration - away_duration
+    return_x, return_y = clamp_to_screen(start_x + rng.randint(-15, 15),
+                                         start_y + rng.randint(-15, 15))
+    
+    path_return = generate_human_path(away_x, away_y, return_x, return_y, return_duration, rng)
+    append_mouse_moves(result, path_return, movement_start + away_duration)
+    
+    return path_return[-1][1], path_return[-1][2]
+
+def idle_drift(result, start_x, start_y, movement_start, pattern_duration, rng):
+    """Slow continuous drift."""
+    target_x, target_y = clamp_to_screen(start_x + rng.randint(-200, 200),
+                                         start_y + rng.randint(-150, 150))
+    
+    path = generate_human_path(start_x, start_y, target_x, target_y, pattern_duration, rng)
+    append_mouse_moves(result, path, movement_start)
+    
+    return path[-1][1], path[-1][2]
+
+def idle_scan(result, start_x, start_y, movement_start, pattern_duration, rng):
+    """Scan across the screen horizontally, vertically or diagonally."""
+    scan_distance = rng.randint(300, 600)
+    direction = rng.choice(['horizontal', 'vertical', 'diagonal'])
+    
+    if direction == 'horizontal':
+        target_x = start_x + (scan_distance if rng.random() < 0.5 else -scan_distance)
+        target_y = start_y + rng.randint(-50, 50)
+    elif direction == 'vertical':
+        target_x = start_x + rng.randint(-50, 50)
+        target_y = start_y + (scan_distance if rng.random() < 0.5 else -scan_distance)
+    else:  # diagonal
+        target_x = start_x + (scan_distance if rng.random() < 0.5 else -scan_distance)
+        target_y = start_y + (scan_distance if rng.random() < 0.5 else -scan_distance)
+    
+    target_x, target_y = clamp_to_screen(target_x, target_y)
+    
+    path = generate_human_path(start_x, start_y, target_x, target_y, pattern_duration, rng)
+    append_mouse_moves(result, path, movement_start)
+    
+    return path[-1][1], path[-1][2]
+
+# Order matters: rng.choice picks by index, so keep it stable for seeded runs
+IDLE_BEHAVIORS = {
+    'wander': idle_wander,          # Random wandering around
+    'check_edge': idle_check_edge,  # Quick look at screen edge
+    'fidget': idle_fidget,          # Small nervous movements
+    'explore': idle_explore,        # Move far then return
+    'drift': idle_drift,            # Slow meandering
+    'scan': idle_scan,              # Move across screen
+}
+IDLE_BEHAVIOR_NAMES = tuple(IDLE_BEHAVIORS)
+
 def insert_idle_mouse_movements(events, rng, movement_percentage):
     """
     Insert realistic human-like mouse movements during idle periods (gaps > 5 seconds).
@@ -224,244 +475,80 @@ def insert_idle_mouse_movements(events, rng, movement_percentage):
     if not events or len(events) < 2:
         return events, 0
     
+    times = [e["Time"] for e in events]
+    # Only gaps >= 5 seconds get idle movements; everything else is copied through in bulk
+    gap_indices = [i for i in range(len(times) - 1) if times[i + 1] - times[i] >= 5000]
+    if not gap_indices:
+        return events, 0
+    in_drag = build_drag_mask(events)
+    
     result = []
     total_idle_time = 0
+    copied = 0
+    # Last known cursor position and the index it was resolved at, so each
+    # backward search only covers events since the previous gap
+    known_x, known_y, known_idx = 500, 500, -1
     
-    for i in range(len(events)):
-        result.append(events[i])
+    for i in gap_indices:
+        result.extend(events[copied:i + 1])
+        copied = i + 1
         
-        # Check gap to next event
-        if i < len(events) - 1:
-            current_time = int(events[i].get("Time", 0))
-            next_time = int(events[i + 1].get("Time", 0))
-            gap = next_time - current_time
-            
-            # Only process gaps >= 5 seconds
-            if gap >= 5000:
-                # Skip if in drag sequence
-                if is_in_drag_sequence(events, i):
-                    continue
-                
-                # Calculate active window
-                active_duration = int(gap * movement_percentage)
-                buffer_start = (gap - active_duration) // 2
-                movement_start = current_time + buffer_start
-                
-                # Get start position
-                start_x, start_y = 500, 500
-                for j in range(i, -1, -1):
-                    x_val = events[j].get("X")
-                    y_val = events[j].get("Y")
-                    if x_val is not None and y_val is not None:
-                        start_x = int(x_val)
-                        start_y = int(y_val)
-                        break
-                
-                # Get next position (where we need to end up)
-                next_x, next_y = start_x, start_y
-                for j in range(i + 1, min(i + 20, len(events))):
-                    x_val = events[j].get("X")
-                    y_val = events[j].get("Y")
-                    if x_val is not None and y_val is not None:
-                        next_x = int(x_val)
-                        next_y = int(y_val)
-                        break
-                
-                # Reserve last 25% for smooth transition back
-                transition_duration = int(active_duration * 0.25)
-                pattern_duration = active_duration - transition_duration
-                
-                # Choose movement behavior
-                behavior = rng.choice([
-                    'wander',      # Random wandering around
-                    'check_edge',  # Quick look at screen edge
-                    'fidget',      # Small nervous movements
-                    'explore',     # Move far then return
-                    'drift',       # Slow meandering
-                    'scan'         # Move across screen
-                ])
-                
-                pattern_end_x, pattern_end_y = start_x, start_y
-                pattern_time_used = 0
-                
-                if behavior == 'wander':
-                    # Random wandering - multiple small moves
-                    num_moves = rng.randint(3, 6)
-                    move_duration = pattern_duration // num_moves
-                    
-                    current_x, current_y = start_x, start_y
-                    
-                    for move_idx in range(num_moves):
-                        # Pick random nearby target
-                        target_x = current_x + rng.randint(-150, 150)
-                        target_y = current_y + rng.randint(-100, 100)
-                        target_x = max(100, min(1800, target_x))
-                        target_y = max(100, min(1000, target_y))
-                        
-                        # Generate human path
-                        path = generate_human_path(current_x, current_y, target_x, target_y, move_duration, rng)
-                        
-                        for path_time, px, py in path:
-                            abs_time = movement_start + pattern_time_used + path_time
-                            result.append({
-                                "Time": abs_time,
-                                "Type": "MouseMove",
-                                "X": px,
-                                "Y": py
-                            })
-                        
-                        current_x, current_y = path[-1][1], path[-1][2]
-                        pattern_time_used += move_duration
-                    
-                    pattern_end_x, pattern_end_y = current_x, current_y
-                
-                elif behavior == 'check_edge':
-                    # Quick look at screen edge then back
-                    edges = [
-                        (150, start_y),    # Left edge
-                        (1750, start_y),   # Right edge
-                        (start_x, 150),    # Top edge
-                        (start_x, 950),    # Bottom edge
-                    ]
-                    edge_x, edge_y = rng.choice(edges)
-                    
-                    # Move to edge (60% of time, fast)
-                    edge_duration = int(pattern_duration * 0.6)
-                    path_to_edge = generate_human_path(start_x, start_y, edge_x, edge_y, edge_duration, rng)
-                    
-                    for path_time, px, py in path_to_edge:
-                        abs_time = movement_start + path_time
-                        result.append({"Time": abs_time, "Type": "MouseMove", "X": px, "Y": py})
-                    
-                    # Return near start (40% of time, slower)
-                    return_duration = pattern_duration - edge_duration
-                    return_x = start_x + rng.randint(-40, 40)
-                    return_y = start_y + rng.randint(-40, 40)
-                    return_x = max(100, min(1800, return_x))
-                    return_y = max(100, min(1000, return_y))
-                    
-                    path_return = generate_human_path(edge_x, edge_y, return_x, return_y, return_duration, rng)
-                    
-                    for path_time, px, py in path_return:
-                        abs_time = movement_start + edge_duration + path_time
-                        result.append({"Time": abs_time, "Type": "MouseMove", "X": px, "Y": py})
-                    
-                    pattern_end_x, pattern_end_y = path_return[-1][1], path_return[-1][2]
-                    pattern_time_used = pattern_duration
-                
-                elif behavior == 'fidget':
-                    # Small rapid movements in small area
-                    num_fidgets = rng.randint(5, 10)
-                    fidget_duration = pattern_duration // num_fidgets
-                    
-                    current_x, current_y = start_x, start_y
-                    
-                    for fidget_idx in range(num_fidgets):
-                        # Small offset
-                        target_x = current_x + rng.randint(-30, 30)
-                        target_y = current_y + rng.randint(-30, 30)
-                        target_x = max(100, min(1800, target_x))
-                        target_y = max(100, min(1000, target_y))
-                        
-                        path = generate_human_path(current_x, current_y, target_x, target_y, fidget_duration, rng)
-                        
-                        for path_time, px, py in path:
-                            abs_time = movement_start + pattern_time_used + path_time
-                            result.append({"Time": abs_time, "Type": "MouseMove", "X": px, "Y": py})
-                        
-                        current_x, current_y = path[-1][1], path[-1][2]
-                        pattern_time_used += fidget_duration
-                    
-                    pattern_end_x, pattern_end_y = current_x, current_y
-                
-                elif behavior == 'explore':
-                    # Move far away then return near start
-                    away_x = start_x + rng.randint(-400, 400)
-                    away_y = start_y + rng.randint(-300, 300)
-                    away_x = max(100, min(1800, away_x))
-                    away_y = max(100, min(1000, away_y))
-                    
-                    # Go away (65% of time)
-                    away_duration = int(pattern_duration * 0.65)
-                    path_away = generate_human_path(start_x, start_y, away_x, away_y, away_duration, rng)
-                    
-                    for path_time, px, py in path_away:
-                        abs_time = movement_start + path_time
-                        result.append({"Time": abs_time, "Type": "MouseMove", "X": px, "Y": py})
-                    
-                    # Return (35% of time)
-                    return_duration = pattern_duration - away_duration
-                    return_x = start_x + rng.randint(-15, 15)
-                    return_y = start_y + rng.randint(-15, 15)
-                    return_x = max(100, min(1800, return_x))
-                    return_y = max(100, min(1000, return_y))
-                    
-                    path_return = generate_human_path(away_x, away_y, return_x, return_y, return_duration, rng)
-                    
-                    for path_time, px, py in path_return:
-                        abs_time = movement_start + away_duration + path_time
-                        result.append({"Time": abs_time, "Type": "MouseMove", "X": px, "Y": py})
-                    
-                    pattern_end_x, pattern_end_y = path_return[-1][1], path_return[-1][2]
-                    pattern_time_used = pattern_duration
-                
-                elif behavior == 'drift':
-                    # Slow continuous drift
-                    target_x = start_x + rng.randint(-200, 200)
-                    target_y = start_y + rng.randint(-150, 150)
-                    target_x = max(100, min(1800, target_x))
-                    target_y = max(100, min(1000, target_y))
-                    
-                    path = generate_human_path(start_x, start_y, target_x, target_y, pattern_duration, rng)
-                    
-                    for path_time, px, py in path:
-                        abs_time = movement_start + path_time
-                        result.append({"Time": abs_time, "Type": "MouseMove", "X": px, "Y": py})
-                    
-                    pattern_end_x, pattern_end_y = path[-1][1], path[-1][2]
-                    pattern_time_used = pattern_duration
-                
-                elif behavior == 'scan':
-                    # Scan across screen
-                    scan_distance = rng.randint(300, 600)
-                    direction = rng.choice(['horizontal', 'vertical', 'diagonal'])
-                    
-                    if direction == 'horizontal':
-                        target_x = start_x + (scan_distance if rng.random() < 0.5 else -scan_distance)
-                        target_y = start_y + rng.randint(-50, 50)
-                    elif direction == 'vertical':
-                        target_x = start_x + rng.randint(-50, 50)
-                        target_y = start_y + (scan_distance if rng.random() < 0.5 else -scan_distance)
-                    else:  # diagonal
-                        target_x = start_x + (scan_distance if rng.random() < 0.5 else -scan_distance)
-                        target_y = start_y + (scan_distance if rng.random() < 0.5 else -scan_distance)
-                    
-                    target_x = max(100, min(1800, target_x))
-                    target_y = max(100, min(1000, target_y))
-                    
-                    path = generate_human_path(start_x, start_y, target_x, target_y, pattern_duration, rng)
-                    
-                    for path_time, px, py in path:
-                        abs_time = movement_start + path_time
-                        result.append({"Time": abs_time, "Type": "MouseMove", "X": px, "Y": py})
-                    
-                    pattern_end_x, pattern_end_y = path[-1][1], path[-1][2]
-                    pattern_time_used = pattern_duration
-                
-                # Smooth transition back to next recorded position
-                transition_path = generate_human_path(
-                    pattern_end_x, pattern_end_y,
-                    next_x, next_y,
-                    transition_duration,
-                    rng
-                )
-                
-                for path_time, px, py in transition_path:
-                    abs_time = movement_start + pattern_duration + path_time
-                    result.append({"Time": abs_time, "Type": "MouseMove", "X": px, "Y": py})
-                
-                total_idle_time += active_duration
+        # Skip if in drag sequence
+        if in_drag[i]:
+            continue
+        
+        current_time = times[i]
+        gap = times[i + 1] - current_time
+        
+        # Calculate active window
+        active_duration = int(gap * movement_percentage)
+        buffer_start = (gap - active_duration) // 2
+        movement_start = current_time + buffer_start
+        
+        # Get start position
+        start_x, start_y = known_x, known_y
+        for j in range(i, known_idx, -1):
+            x_val = events[j].get("X")
+            y_val = events[j].get("Y")
+            if x_val is not None and y_val is not None:
+                start_x = int(x_val)
+                start_y = int(y_val)
+                break
+        known_x, known_y, known_idx = start_x, start_y, i
+        
+        # Get next position (where we need to end up)
+        next_x, next_y = start_x, start_y
+        for j in range(i + 1, min(i + 20, len(events))):
+            x_val = events[j].get("X")
+            y_val = events[j].get("Y")
+            if x_val is not None and y_val is not None:
+                next_x = int(x_val)
+                next_y = int(y_val)
+                break
+        
+        # Reserve last 25% for smooth transition back
+        transition_duration = int(active_duration * 0.25)
+        pattern_duration = active_duration - transition_duration
+        
+        # Choose movement behavior and emit its pattern
+        behavior = rng.choice(IDLE_BEHAVIOR_NAMES)
+        pattern_end_x, pattern_end_y = IDLE_BEHAVIORS[behavior](
+            result, start_x, start_y, movement_start, pattern_duration, rng
+        )
+        
+        # Smooth transition back to next recorded position
+        transition_path = generate_human_path(
+            pattern_end_x, pattern_end_y,
+            next_x, next_y,
+            transition_duration,
+            rng
+        )
+        
+        append_mouse_moves(result, transition_path, movement_start + pattern_duration)
+        
+        total_idle_time += active_duration
     
+    result.extend(events[copied:])
     return result, total_idle_time
 
 class QueueFileSelector:
@@ -470,22 +557,30 @@ class QueueFileSelector:
         self.durations = durations_cache
         self.efficient = [f for f in all_files if "¬¬¬" not in f.name]
         self.inefficient = [f for f in all_files if "¬¬¬" in f.name]
-        self.eff_pool = list(self.efficient)
-        self.ineff_pool = list(self.inefficient)
-        self.rng.shuffle(self.eff_pool)
-        self.rng.shuffle(self.ineff_pool)
+        self.reset()
+
+    def reset(self):
+        """Refill and reshuffle both queues so the next sequence starts fresh."""
+        self.eff_pool = self._shuffled(self.efficient)
+        self.ineff_pool = self._shuffled(self.inefficient)
+
+    def _shuffled(self, files):
+        # Shuffle as a list, then hand out from a deque for O(1) popleft()
+        order = list(files)
+        self.rng.shuffle(order)
+        return deque(order)
 
     def get_sequence(self, target_minutes, force_inef=False, strictly_eff=False):
         seq, cur_ms = [], 0.0
         target_ms = target_minutes * 60000
         actual_force = force_inef if not strictly_eff else False
         while cur_ms < target_ms:
-            if actual_force and self.ineff_pool: pick = self.ineff_pool.pop(0)
-            elif self.eff_pool: pick = self.eff_pool.pop(0)
+            if actual_force and self.ineff_pool: pick = self.ineff_pool.popleft()
+            elif self.eff_pool: pick = self.eff_pool.popleft()
             elif self.efficient:
-                self.eff_pool = list(self.efficient); self.rng.shuffle(self.eff_pool)
-                pick = self.eff_pool.pop(0)
-            elif self.ineff_pool and not strictly_eff: pick = self.ineff_pool.pop(0)
+                self.eff_pool = self._shuffled(self.efficient)
+                pick = self.eff_pool.popleft()
+            elif self.ineff_pool and not strictly_eff: pick = self.ineff_pool.popleft()
             else: break
             seq.append(pick)
             cur_ms += (self.durations.get(pick, 2000) + 1500)
@@ -500,6 +595,7 @@ def main():
     parser.add_argument("--target-minutes", type=int, default=35)
     parser.add_argument("--bundle-id", type=int, required=True)
     parser.add_argument("--speed-range", type=str, default="1.0 1.0")
+    parser.add_argument("--pretty", action="store_true", help="Indent merged JSON output (larger, slower to write)")
     args = parser.parse_args()
 
     search_base = Path(args.input_root).resolve()
@@ -538,86 +634,77 @@ def main():
     pools = {}
     z_storage = {}
     durations_cache = {}
+    events_cache = {}
+    start_times_cache = {}
+    discovered_files = []
+    pools_by_identity = {}
 
-    for root, dirs, files in os.walk(originals_root):
-        curr = Path(root)
-        if any(p in curr.parts for p in [".git", ".github", "output"]): continue
-        
-        jsons = [f for f in files if f.endswith(".json") and "click_zones" not in f.lower()]
-        non_jsons = [f for f in files if not f.endswith(".json")]
-        
+    for root, files, parent_scope in walk_macro_dirs(originals_root):
+        # Single pass over the names; click-zone JSON belongs to neither list
+        jsons, non_jsons = [], []
+        for f in files:
+            if not f.endswith(".json"):
+                non_jsons.append(f)
+            elif "click_zones" not in f.lower():
+                jsons.append(f)
         if not jsons: continue
         
-        is_z_storage = "z +100" in str(curr).lower()
+        # Work on the plain path string until the folder is known to hold macros
+        curr = Path(root)
+        is_z_storage = "z +100" in root.lower()
         
         if is_z_storage:
-            parent_scope = None
-            for part in curr.parts:
-                if "desktop" in part.lower() or "mobile" in part.lower():
-                    parent_scope = part
-                    break
-            
             if parent_scope:
                 macro_id = clean_identity(curr.name)
                 key = (parent_scope, macro_id)
-                if key not in z_storage:
-                    z_storage[key] = []
+                file_paths = [curr / f for f in jsons]
+                z_storage.setdefault(key, []).extend(file_paths)
+                
+                # Feed Z +100 files straight into every pool already seen with this identity
+                for pool_data in pools_by_identity.get(key, []):
+                    add_pool_files(pool_data, file_paths)
                 
-                for f in jsons:
-                    file_path = curr / f
-                    z_storage[key].append(file_path)
-                    durations_cache[file_path] = get_file_duration_ms(file_path)
+                discovered_files.extend(file_paths)
         else:
             macro_id = clean_identity(curr.name)
             rel_path = curr.relative_to(originals_root)
             
-            parent_scope = None
-            for part in curr.parts:
-                if "desktop" in part.lower() or "mobile" in part.lower():
-                    parent_scope = part
-                    break
-            
             key = str(rel_path).lower()
             if key not in pools:
-                is_ts = bool(re.search(r'time[\s-]*sens', key))
+                is_ts = bool(TIME_SENSITIVE_RE.search(key))
                 file_paths = [curr / f for f in jsons]
                 
+                folder_number = extract_folder_number(rel_path.name)
+                if folder_number == 0:
+                    print(f"WARNING: No number found in folder name '{rel_path.name}', using 0")
+                
                 pools[key] = {
                     "rel_path": rel_path,
-                    "files": file_paths,
+                    "files": [],
+                    "always_files": [],
                     "is_ts": is_ts,
                     "macro_id": macro_id,
                     "parent_scope": parent_scope,
+                    "folder_number": folder_number,
                     "non_json_files": [curr / f for f in non_jsons]
                 }
                 
-                for fp in file_paths:
-                    durations_cache[fp] = get_file_duration_ms(fp)
+                # Own files first, then any Z +100 files found earlier in the walk
+                z_key = (parent_scope, macro_id)
+                add_pool_files(pools[key], file_paths)
+                add_pool_files(pools[key], z_storage.get(z_key, []))
+                pools_by_identity.setdefault(z_key, []).append(pools[key])
+                
+                discovered_files.extend(file_paths)
+
+    # Parse every discovered file in one batch. A process pool was measured
+    # slower here: pickling the parsed events back costs more than orjson parsing.
+    for fp in discovered_files:
+        events_cache[fp] = load_json_events(fp)
+        start, end = get_events_time_bounds(events_cache[fp])
+        start_times_cache[fp] = start
+        durations_cache[fp] = end - start
 
-    for pool_key, pool_data in pools.items():
-        parent_scope = pool_data["parent_scope"]
-        macro_id = pool_data["macro_id"]
-        
-        z_key = (parent_scope, macro_id)
-        if z_key in z_storage:
-            pool_data["files"].extend(z_storage[z_key])
-    
-    for pool_key, pool_data in pools.items():
-        all_files = pool_data["files"]
-        always_files = [f for f in all_files if is_always_first_or_last_file(Path(f).name)]
-        mergeable_files = [f for f in all_files if f not in always_files]
-        pool_data["files"] = mergeable_files
-        pool_data["always_files"] = always_files
-    
-    for key, data in pools.items():
-        folder_name = data["rel_path"].name
-        folder_number = extract_folder_number(folder_name)
-        
-        if folder_number == 0:
-            print(f"WARNING: No number found in folder name '{folder_name}', using 0")
-        
-        data["folder_number"] = folder_number
-    
     for key, data in pools.items():
         folder_number = data["folder_number"]
         
@@ -641,7 +728,7 @@ def main():
                     # Add dash: "logout.json" → "- 46 LOGOUT.JSON"
                     new_name = f"- {folder_number} {original_name}".upper()
                 logout_dest = out_f / new_name
-                shutil.copy2(logout_file, logout_dest)
+                clone_file(logout_file, logout_dest)
                 print(f"  ✓ Copied logout: {original_name} → {new_name}")
             except Exception as e:
                 print(f"  ✗ Error copying {logout_file.name}: {e}")
@@ -659,7 +746,7 @@ def main():
                     else:
                         # Add dash: "file.png" → "- 46 file.png"
                         new_name = f"- {folder_number} {original_name}"
-                    shutil.copy2(non_json_file, out_f / new_name)
+                    clone_file(non_json_file, out_f / new_name)
                     print(f"  ✓ Copied non-JSON file: {original_name} → {new_name}")
                 except Exception as e:
                     print(f"  ✗ Error copying {non_json_file.name}: {e}")
@@ -667,17 +754,17 @@ def main():
         if "always_files" in data and data["always_files"]:
             for always_file in data["always_files"]:
                 try:
-                    original_name = Path(always_file).name
+                    original_name = always_file.name
                     # Add folder number prefix: "- always first.json" → "- 46 always first.json"
                     # Handle files starting with "-" or "always"
                     if original_name.startswith("-"):
                         new_name = f"- {folder_number} {original_name[1:].strip()}"
                     else:
                         new_name = f"{folder_number} {original_name}"
-                    shutil.copy2(always_file, out_f / new_name)
+                    clone_file(always_file, out_f / new_name)
                     print(f"  ✓ Copied 'always' file: {original_name} → {new_name}")
                 except Exception as e:
-                    print(f"  ✗ Error copying {Path(always_file).name}: {e}")
+                    print(f"  ✗ Error copying {always_file.name}: {e}")
         
         total_original_ms = sum(durations_cache.get(f, 0) for f in data["files"])
         
@@ -693,6 +780,7 @@ def main():
         
         norm_v = args.versions
         inef_v = 0 if data["is_ts"] else (norm_v // 2)
+        selector = None
         
         for v_idx in range(1, (norm_v + inef_v) + 1):
             is_inef = (v_idx > norm_v)
@@ -700,8 +788,8 @@ def main():
             v_code = f"{folder_number}{v_letter}"
             
             if data["is_ts"]: mult = rng.choice([1.0, 1.2, 1.5])
-            elif is_inef: mult = rng.choices([1, 2, 3], weights=[20, 40, 40], k=1)[0]
-            else: mult = rng.choices([1, 2, 3], weights=[50, 30, 20], k=1)[0]
+            elif is_inef: mult = rng.choices(MULTIPLIERS, cum_weights=INEF_MULT_CUM_WEIGHTS)[0]
+            else: mult = rng.choices(MULTIPLIERS, cum_weights=NORMAL_MULT_CUM_WEIGHTS)[0]
             
             movement_percentage = rng.uniform(0.40, 0.50)
             
@@ -713,20 +801,25 @@ def main():
             merged = []
             timeline = 0
             
-            paths = QueueFileSelector(rng, data["files"], durations_cache).get_sequence(args.target_minutes, is_inef, data["is_ts"])
+            # One selector per folder; reset() reshuffles it for each version
+            if selector is None:
+                selector = QueueFileSelector(rng, data["files"], durations_cache)
+            else:
+                selector.reset()
+            paths = selector.get_sequence(args.target_minutes, is_inef, data["is_ts"])
             
             if not paths:
                 continue
             
             for i, p in enumerate(paths):
-                raw = load_json_events(p)
+                raw = events_cache[p]
                 if not raw: continue
                 
                 raw_with_movements, idle_time = insert_idle_mouse_movements(raw, rng, movement_percentage)
                 total_idle_movements += idle_time
                 
-                t_vals = [int(e["Time"]) for e in raw_with_movements]
-                base_t = min(t_vals)
+                # Idle movements always fall inside gaps, so the recorded start time is still the minimum
+                base_t = start_times_cache[p]
                 
                 gap = int(rng.randint(500, 2500) * mult) if i > 0 else 0
                 timeline += gap
@@ -734,10 +827,11 @@ def main():
                 
                 file_start_idx = len(merged)  # Track where this file starts in merged array
                 
+                # Rebase the whole file onto the timeline with one precomputed shift
+                shift = timeline - base_t
                 for e in raw_with_movements:
-                    ne = {**e}
-                    rel_offset = int(int(e["Time"]) - base_t)
-                    ne["Time"] = timeline + rel_offset
+                    ne = e.copy()
+                    ne["Time"] = e["Time"] + shift
                     merged.append(ne)
                 
                 timeline = merged[-1]["Time"]
@@ -754,7 +848,7 @@ def main():
             if is_inef and not data["is_ts"] and len(merged) > 1:
                 p_ms = rng.randint(300000, 720000)
                 split = rng.randint(0, len(merged) - 2)
-                for j in range(split + 1, len(merged)): merged[j]["Time"] += p_ms
+                for e in merged[split + 1:]: e["Time"] += p_ms
                 timeline = merged[-1]["Time"]
                 massive_pause_info = f"Massive P1: {format_ms_precise(p_ms)}"
                 
@@ -766,7 +860,7 @@ def main():
                         seg["end_time"] = merged[seg["end_idx"]]["Time"]
             
             fname = f"{'¬¬¬' if is_inef else ''}{v_code}_{int(timeline/60000)}m.json"
-            (out_f / fname).write_text(json.dumps(merged, indent=2))
+            (out_f / fname).write_bytes(json_dumps_bytes(merged, args.pretty))
             
             total_pause = total_gaps + total_afk_pool
             if massive_pause_info: